@@ -1,6 +1,7 @@
 """Configuration settings for the FastAPI Sales Analytics application."""
+from functools import lru_cache
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
@@ -52,12 +53,25 @@ class Settings(BaseSettings):
     # Adjust based on your needs, but keep reasonable limits for security
     MAX_FILE_SIZE: int
     
+    # Parquet Cache
+    # Optional directory where parsed uploads are persisted as Parquet, keyed by
+    # content hash, so repeat uploads skip CSV/Excel parsing across restarts
+    # Leave unset to disable the on-disk cache
+    # NOTE: Files are never removed by the app, so the directory grows with every
+    # distinct upload; cap it externally (e.g. a cron job deleting old files)
+    PARQUET_CACHE_DIR: Optional[str] = None
+    
     class Config:
         env_file = ".env"
-        env_files = [".env", ".env.example"]
         env_file_encoding = "utf-8"
         case_sensitive = False
 
 
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the cached settings instance (usable as a FastAPI dependency)."""
+    return Settings()
+
+
 # Global settings instance
-settings = Settings()
+settings = get_settings()
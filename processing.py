@@ -1,35 +1,314 @@
 """Data processing functions for sales analytics."""
+import hashlib
+import json
 import logging
+import os
+import shutil
+import tempfile
+import threading
+import numpy as np
 import pandas as pd
-from io import BytesIO
+import pandas.api.types as pdt
+import io
 from pathlib import Path
+from collections import OrderedDict
+from typing import Any, BinaryIO, Callable, Dict, Hashable, NamedTuple, Optional, Tuple
 from fastapi import UploadFile, HTTPException
 from schemas import DateRangeStats, SalesAnalytics, ValidationStats, ValidationResults, TimeAnalysis, CustomerSegments, AnalyzeResponse, ErrorResponse
 
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional; CSV parsing falls back to pandas
+    pa = pacsv = pq = None
+
 logger = logging.getLogger(__name__)
 
 # Supported file extensions (case-insensitive)
 ALLOWED_EXTENSIONS = {'.csv', '.xlsx', '.xls'}
 
+# Required sales columns, in the order missing ones are reported. Parsers
+# infer their types; validation coerces any that aren't already typed.
+REQUIRED_COLUMNS = ("date", "product", "quantity", "price", "customer")
+_REQUIRED_SET = frozenset(REQUIRED_COLUMNS)
+
+# Strings pandas' CSV parser reads as missing by default; pyarrow's own default
+# list lacks "None" and "<NA>"
+CSV_NULL_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None",
+    "n/a", "nan", "null",
+]
+
+# Bytes per block handed to each pyarrow CSV parsing thread
+CSV_BLOCK_SIZE = 8 << 20  # 8 MiB
+
+# Chunk size used when hashing an upload
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
+
+# Number of distinct uploads whose results are kept in memory per cache
+UPLOAD_CACHE_SIZE = 32
+
+# Parquet schema metadata key holding the parsed frame's original dtypes
+PARQUET_DTYPES_KEY = b"upload_dtypes"
+
+# Memory budget for cached /analyze results. Results hold a dict entry per
+# customer and per day, so files with many distinct keys are large.
+ANALYSIS_CACHE_BYTES = 64 << 20  # 64 MiB
+# Approximate cost of one result dict entry beyond its key's characters
+# (key str header, float object and dict slot)
+ANALYSIS_ENTRY_BYTES = 64
+
+# Rows returned as sample_data by /quick-stats
+SAMPLE_ROWS = 5
+
 
-def validate_and_read_file(file: UploadFile, max_size: int) -> pd.DataFrame:
-    """Validate file type and size, then read into DataFrame.
+class _LRUCache:
+    """Small thread-safe LRU mapping, used to cache work per upload content hash.
     
-    This is a unified helper that handles:
-    - File extension validation (case-insensitive)
-    - File size validation
-    - Reading CSV and Excel files
+    Bounded by entry count and, when sizeof is given, by the total size it
+    reports for the cached values. Values larger than the whole budget are not
+    cached at all.
+    """
+    
+    def __init__(
+        self,
+        maxsize: int,
+        maxbytes: Optional[int] = None,
+        sizeof: Optional[Callable[[Any], int]] = None
+    ):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.sizeof = sizeof
+        self._data: OrderedDict = OrderedDict()  # key -> (value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable) -> Any:
+        """Return the cached value (marking it most recently used) or None."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            self._data.move_to_end(key)
+            return entry[0]
+    
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting least recently used entries until within bounds."""
+        size = self.sizeof(value) if self.sizeof is not None else 0
+        if self.maxbytes is not None and size > self.maxbytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._data[key] = (value, size)
+            self._bytes += size
+            while len(self._data) > self.maxsize or (
+                self.maxbytes is not None and self._bytes > self.maxbytes
+            ):
+                _, (_, evicted_size) = self._data.popitem(last=False)
+                self._bytes -= evicted_size
+
+
+def _analysis_size(result: Tuple[ValidationResults, Optional[SalesAnalytics]]) -> int:
+    """Approximate in-memory size of a cached analyze_upload result.
+    
+    Dominated by the per-key dicts; every customer appears in one segment.
+    """
+    _, analytics = result
+    if analytics is None:
+        return 0
+    segments = analytics.customer_segments
+    time_analysis = analytics.time_analysis
+    mappings = (
+        analytics.top_products_by_revenue,
+        analytics.top_products_by_quantity,
+        segments.high_value,
+        segments.medium_value,
+        segments.low_value,
+        time_analysis.daily_revenue or {},
+        time_analysis.monthly_revenue or {},
+    )
+    return sum(
+        len(mapping) * ANALYSIS_ENTRY_BYTES + sum(len(key) for key in mapping)
+        for mapping in mappings
+    )
+
+
+# Keyed by (file extension, SHA-256 of the upload). Only small per-upload
+# results are kept; the raw parsed frame is never cached.
+# /quick-stats summaries (shape, dtypes and a few sample rows)
+_summary_cache = _LRUCache(UPLOAD_CACHE_SIZE)
+# ValidationResults of /validate
+_validation_cache = _LRUCache(UPLOAD_CACHE_SIZE)
+# (ValidationResults, SalesAnalytics or None) results of analyze_upload, bounded by memory
+analysis_cache = _LRUCache(UPLOAD_CACHE_SIZE, ANALYSIS_CACHE_BYTES, _analysis_size)
+
+
+class UploadReadError(ValueError):
+    """Raised by analyze_upload when the uploaded file cannot be parsed."""
+
+
+def _check_upload_size(file: UploadFile, max_size: int) -> None:
+    """Reject uploads larger than max_size without loading them into memory.
+    
+    The spooled upload is always seekable, so its size is measured with a single
+    seek-to-end/tell, which works whether or not Starlette reported a size.
+    
+    Raises:
+        HTTPException: 413 if the upload exceeds max_size
+    """
+    stream = file.file
+    stream.seek(0, io.SEEK_END)
+    size = stream.tell()
+    stream.seek(0)
+    if size > max_size:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File size ({size} bytes) exceeds maximum allowed size ({max_size} bytes)"
+        )
+
+
+def _read_csv(source: BinaryIO) -> pd.DataFrame:
+    """Parse CSV from a binary file object with pyarrow's multi-threaded reader.
+    
+    The upload's spooled file is passed straight through, so the raw bytes are
+    never materialized as a separate Python object. The Arrow table is converted
+    to pandas only at this boundary. Types are inferred by the parser rather
+    than forced up front so that malformed values still reach
+    validation instead of failing the whole read. Falls back to pandas' C
+    engine when pyarrow is not installed, and for files pyarrow is stricter
+    about than pandas (rows with missing or extra fields, duplicate or empty
+    header names), so those parse exactly as they always have.
+    """
+    if pacsv is None:
+        return pd.read_csv(source)
+    
+    start = source.tell()
+    try:
+        table = pacsv.read_csv(
+            source,
+            read_options=pacsv.ReadOptions(use_threads=True, block_size=CSV_BLOCK_SIZE),
+            # Match pandas: the same null markers, in string columns too
+            convert_options=pacsv.ConvertOptions(
+                null_values=CSV_NULL_VALUES,
+                strings_can_be_null=True
+            )
+        )
+    except pa.ArrowInvalid as e:
+        logger.info(f"pyarrow could not parse CSV ({str(e)}); retrying with pandas")
+        source.seek(start)
+        return pd.read_csv(source)
+    
+    names = table.column_names
+    if len(set(names)) != len(names) or "" in names:
+        # pandas renames duplicate and empty headers (price.1, Unnamed: 5)
+        source.seek(start)
+        return pd.read_csv(source)
+    return table.to_pandas(split_blocks=True, self_destruct=True, date_as_object=False)
+
+
+def read_file_summary(
+    file: UploadFile,
+    max_size: int,
+    parquet_cache_dir: Optional[str] = None
+) -> Dict[str, Any]:
+    """Read an upload and summarize it for /quick-stats, reusing cached summaries.
+    
+    Only the summary is cached, so repeat requests for large files keep a few
+    sample rows in memory rather than the whole parsed frame.
     
     Args:
         file: Uploaded file object
         max_size: Maximum allowed file size in bytes
+        parquet_cache_dir: Optional directory for persisted Parquet copies of uploads
         
     Returns:
-        Parsed pandas DataFrame
+        Dict with rows, columns, column_names, data_types and sample_data
+        (one list per column)
+        
+    Raises:
+        HTTPException: If file type is unsupported, size exceeds limit, or reading fails
+    """
+    key = upload_cache_key(file, max_size)
+    summary = _summary_cache.get(key)
+    if summary is not None:
+        logger.info(f"Using cached summary of file '{file.filename}'")
+        return summary
+    
+    df = _read_upload(file, key, parquet_cache_dir)
+    # NaT/NaN are not JSON-serializable as sample values, so report them as null
+    sample = df.head(SAMPLE_ROWS).astype(object)
+    sample = sample.where(sample.notna(), None)
+    summary = {
+        "rows": len(df),
+        "columns": len(df.columns),
+        "column_names": list(df.columns),
+        "data_types": {col: str(dtype) for col, dtype in df.dtypes.items()},
+        "sample_data": sample.to_dict(orient="list"),
+    }
+    _summary_cache.put(key, summary)
+    return summary
+
+
+def read_and_validate_file(
+    file: UploadFile,
+    max_size: int,
+    parquet_cache_dir: Optional[str] = None
+) -> ValidationResults:
+    """Read an upload and run validate_sales_data on it, reusing cached results.
+    
+    Only the ValidationResults are cached by content hash, so re-validating
+    the same file skips parsing and validation entirely without keeping any
+    frame in memory.
+    
+    Args:
+        file: Uploaded file object
+        max_size: Maximum allowed file size in bytes
+        parquet_cache_dir: Optional directory for persisted Parquet copies of uploads
+        
+    Returns:
+        ValidationResults model with validation status and quality score
         
     Raises:
         HTTPException: If file type is unsupported, size exceeds limit, or reading fails
     """
+    key = upload_cache_key(file, max_size)
+    validation_results = _validation_cache.get(key)
+    if validation_results is not None:
+        logger.info(f"Using cached validation of file '{file.filename}'")
+        return validation_results
+    
+    validation_results = validate_sales_data(_read_upload(file, key, parquet_cache_dir))
+    _validation_cache.put(key, validation_results)
+    return validation_results
+
+
+def _hash_upload(stream: BinaryIO) -> bytes:
+    """Return the SHA-256 digest of a seekable stream, read in chunks."""
+    digest = hashlib.sha256()
+    stream.seek(0)
+    while chunk := stream.read(UPLOAD_CHUNK_SIZE):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.digest()
+
+
+def upload_cache_key(file: UploadFile, max_size: int) -> Tuple[str, bytes]:
+    """Validate file type and size, then return the upload's content cache key.
+    
+    Args:
+        file: Uploaded file object
+        max_size: Maximum allowed file size in bytes
+        
+    Returns:
+        Tuple of (lower-cased file extension, SHA-256 digest of the contents)
+        
+    Raises:
+        HTTPException: If file type is unsupported or size exceeds limit
+    """
     # Validate file extension (case-insensitive)
     file_ext = Path(file.filename).suffix.lower() if file.filename else ''
     
@@ -40,28 +319,103 @@ def validate_and_read_file(file: UploadFile, max_size: int) -> pd.DataFrame:
         )
     
     # SECURITY: Validate file size before reading into memory to prevent DoS attacks
-    if file.size and file.size > max_size:
-        raise HTTPException(
-            status_code=413,
-            detail=f"File size ({file.size} bytes) exceeds maximum allowed size ({max_size} bytes)"
-        )
+    _check_upload_size(file, max_size)
+    
+    return file_ext, _hash_upload(file.file)
+
+
+def spool_upload_to_disk(file: UploadFile) -> str:
+    """Copy an upload to a named temporary file and return its path.
+    
+    Lets a worker process read the upload itself instead of receiving its
+    bytes pickled through the pool's pipe, so the contents are never held in
+    memory as a whole. The caller must delete the file.
+    """
+    file.file.seek(0)
+    with tempfile.NamedTemporaryFile(prefix="upload-", delete=False) as tmp:
+        try:
+            shutil.copyfileobj(file.file, tmp, UPLOAD_CHUNK_SIZE)
+        except BaseException:
+            tmp.close()
+            os.remove(tmp.name)
+            raise
+        finally:
+            file.file.seek(0)
+    return tmp.name
+
+
+def _parse_upload(source: BinaryIO, file_ext: str) -> pd.DataFrame:
+    """Parse an upload stream based on its (already validated) file extension."""
+    if file_ext == '.csv':
+        return _read_csv(source)
+    return pd.read_excel(source)  # .xlsx or .xls
+
+
+def _write_parquet(df: pd.DataFrame, path: Path) -> None:
+    """Write a parsed upload to Parquet, recording its dtypes in the schema metadata."""
+    table = pa.Table.from_pandas(df)
+    dtypes = json.dumps([str(dtype) for dtype in df.dtypes]).encode()
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), PARQUET_DTYPES_KEY: dtypes})
+    pq.write_table(table, path, compression="snappy")
+
+
+def _read_parquet(path: Path) -> pd.DataFrame:
+    """Read a Parquet copy written by _write_parquet back into the original dtypes.
+    
+    Parquet has no second-resolution timestamps, so e.g. datetime64[s] columns
+    from the CSV reader come back as datetime64[ms] unless cast back.
+    """
+    table = pq.read_table(path)
+    df = table.to_pandas()
+    dtypes = json.loads(table.schema.metadata[PARQUET_DTYPES_KEY])
+    for i, dtype in enumerate(dtypes):
+        if dtype.startswith("datetime64") and str(df.dtypes.iloc[i]) != dtype:
+            df.isetitem(i, df.iloc[:, i].astype(dtype))
+    return df
+
+
+def _load_upload(
+    source: BinaryIO,
+    key: Tuple[str, bytes],
+    parquet_cache_dir: Optional[str]
+) -> pd.DataFrame:
+    """Parse an upload, reusing or persisting a Parquet copy when a cache dir is set.
+    
+    Parquet copies are named after the content hash, so they survive restarts and
+    are shared by all worker processes. Failing to read or write one is logged
+    and falls back to parsing the upload itself.
+    """
+    file_ext, digest = key
+    if not parquet_cache_dir:
+        return _parse_upload(source, file_ext)
     
+    path = Path(parquet_cache_dir) / f"{digest.hex()}{file_ext}.parquet"
+    if path.exists():
+        try:
+            return _read_parquet(path)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable Parquet cache file '{path}': {str(e)}")
+    
+    df = _parse_upload(source, file_ext)
     try:
-        contents = file.file.read()
-        
-        # Additional check: validate actual content size (file.size might be None)
-        if len(contents) > max_size:
-            raise HTTPException(
-                status_code=413,
-                detail=f"File size ({len(contents)} bytes) exceeds maximum allowed size ({max_size} bytes)"
-            )
-        
-        # Read based on file type
-        if file_ext == '.csv':
-            df = pd.read_csv(BytesIO(contents))
-        else:  # .xlsx or .xls
-            df = pd.read_excel(BytesIO(contents))
-        
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write under a temporary name so concurrent readers never see a partial file
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        _write_parquet(df, tmp_path)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.warning(f"Could not persist Parquet cache file '{path}': {str(e)}")
+    return df
+
+
+def _read_upload(
+    file: UploadFile,
+    key: Tuple[str, bytes],
+    parquet_cache_dir: Optional[str] = None
+) -> pd.DataFrame:
+    """Parse an upload already checked by upload_cache_key into a DataFrame."""
+    try:
+        df = _load_upload(file.file, key, parquet_cache_dir)
         logger.info(f"Successfully read file '{file.filename}' with {len(df)} rows")
         return df
         
@@ -91,23 +445,10 @@ def read_csv_file(file: UploadFile, max_size: int) -> pd.DataFrame:
         HTTPException: If file size exceeds limit or reading fails
     """
     # SECURITY: Validate file size before reading into memory to prevent DoS attacks
-    if file.size and file.size > max_size:
-        raise HTTPException(
-            status_code=413,
-            detail=f"File size ({file.size} bytes) exceeds maximum allowed size ({max_size} bytes)"
-        )
+    _check_upload_size(file, max_size)
     
     try:
-        contents = file.file.read()
-        
-        # Additional check: validate actual content size (file.size might be None)
-        if len(contents) > max_size:
-            raise HTTPException(
-                status_code=413,
-                detail=f"File size ({len(contents)} bytes) exceeds maximum allowed size ({max_size} bytes)"
-            )
-        
-        df = pd.read_csv(BytesIO(contents))
+        df = _read_csv(file.file)
         return df
     except HTTPException:
         raise
@@ -131,22 +472,10 @@ def read_excel_file(file: UploadFile, max_size: int) -> pd.DataFrame:
         Parsed pandas DataFrame
     """
     # SECURITY: Validate file size before reading into memory to prevent DoS attacks
-    if file.size and file.size > max_size:
-        raise HTTPException(
-            status_code=413,
-            detail=f"File size ({file.size} bytes) exceeds maximum allowed size ({max_size} bytes)"
-        )
+    _check_upload_size(file, max_size)
     
     try:
-        contents = file.file.read()
-        
-        # Additional check: validate actual content size (file.size might be None)
-        if len(contents) > max_size:
-            raise HTTPException(
-                status_code=413,
-                detail=f"File size ({len(contents)} bytes) exceeds maximum allowed size ({max_size} bytes)"
-            )
-        df = pd.read_excel(BytesIO(contents))
+        df = pd.read_excel(file.file)
         return df
     except HTTPException:
         logger.error("HTTPException")
@@ -158,6 +487,155 @@ def read_excel_file(file: UploadFile, max_size: int) -> pd.DataFrame:
         file.file.seek(0)
 
 
+def _as_numeric(series: pd.Series) -> pd.Series:
+    """Coerce a column to numeric, skipping the conversion if it already is."""
+    if pdt.is_numeric_dtype(series):
+        return series
+    return pd.to_numeric(series, errors="coerce")
+
+
+def _as_datetime(series: pd.Series) -> pd.Series:
+    """Coerce a column to datetime, skipping the conversion if it already is.
+    
+    ISO 8601 values are parsed on the fast path with the format given up front;
+    only values that fail it go through pandas' per-format inference. cache=True
+    parses each distinct date string once. Columns mixing tz-aware and naive
+    values don't fit a single datetime64 dtype on the fast path, so they are
+    parsed in one pass by pandas' default inference instead.
+    """
+    if pdt.is_datetime64_any_dtype(series):
+        return series
+    parsed = pd.to_datetime(series, errors="coerce", format="ISO8601", cache=True)
+    if pdt.is_datetime64_any_dtype(parsed):
+        unparsed = parsed.isna() & series.notna()
+        if not unparsed.any():
+            return parsed
+        fallback = pd.to_datetime(series[unparsed], errors="coerce", cache=True)
+        if fallback.dtype == parsed.dtype:
+            parsed[unparsed] = fallback
+            return parsed
+    return pd.to_datetime(series, errors="coerce", cache=True)
+
+
+def _scan_numeric(values: np.ndarray) -> Tuple[int, int, int]:
+    """Count missing, negative and zero entries of a float64 column.
+    
+    Shared by the quantity and price checks so each column is reduced by the
+    same vectorized kernels. NaN compares False, so no dropna copy is needed.
+    
+    Returns:
+        Tuple of (missing, negative, zero) counts
+    """
+    missing = int(np.count_nonzero(np.isnan(values)))
+    negative = int(np.count_nonzero(values < 0))
+    zero = int(np.count_nonzero(values == 0))
+    return missing, negative, zero
+
+
+class _ColumnSpec(NamedTuple):
+    """How one typed sales column is coerced, range-checked and reported.
+    
+    Message templates are formatted with the affected row count.
+    """
+    column: str
+    kind: str  # "numeric" or "datetime"
+    unparsed_msg: str
+    missing_msg: str
+    out_of_range_msg: Optional[str] = None
+    allow_zero: bool = True
+    # Coercion failures fail validation unless reported as warnings
+    failure_is_warning: bool = False
+
+
+# Typed columns checked by prepare_sales_data, in reporting order
+_COLUMN_SPECS = (
+    _ColumnSpec(
+        column="quantity",
+        kind="numeric",
+        unparsed_msg="{count} quantity values are not numeric",
+        missing_msg="{count} quantity values are missing/null",
+        out_of_range_msg="{count} quantities are zero or negative",
+        allow_zero=False
+    ),
+    _ColumnSpec(
+        column="price",
+        kind="numeric",
+        unparsed_msg="{count} prices could not be parsed",
+        missing_msg="{count} prices are missing/null",
+        out_of_range_msg="{count} prices are negative"
+    ),
+    _ColumnSpec(
+        column="date",
+        kind="datetime",
+        unparsed_msg="{count} dates could not be parsed",
+        missing_msg="{count} dates are missing/null",
+        failure_is_warning=True
+    ),
+)
+
+
+def _check_typed_columns(
+    df: pd.DataFrame,
+    null_counts: pd.Series,
+    validation_results: ValidationResults
+) -> Dict[str, pd.Series]:
+    """Coerce every column in _COLUMN_SPECS and record its warnings/errors.
+    
+    Args:
+        df: Input DataFrame (not modified)
+        null_counts: Per-column null counts of df, computed once by the caller
+        validation_results: Results to append warnings and errors to
+        
+    Returns:
+        Mapping of column name to its coerced Series (the original column if
+        coercion failed)
+    """
+    total_rows = len(df)
+    coerced = {}
+    
+    for spec in _COLUMN_SPECS:
+        column = df[spec.column]
+        coerced[spec.column] = column
+        try:
+            original_nulls = int(null_counts[spec.column])
+            
+            if spec.kind == "numeric":
+                converted = _as_numeric(column)
+                missing, negative, zero = _scan_numeric(converted.to_numpy(dtype=np.float64, na_value=np.nan))
+                out_of_range = negative if spec.allow_zero else negative + zero
+            else:
+                converted = _as_datetime(column)
+                if not pdt.is_datetime64_any_dtype(converted):
+                    raise ValueError("values could not be converted to a single datetime type (mixed time zones?)")
+                missing = int(converted.isna().sum())
+                out_of_range = 0
+            coerced[spec.column] = converted
+            
+            # New nulls created by conversion are reported separately from original nulls
+            counts = [(spec.unparsed_msg, missing - original_nulls), (spec.missing_msg, original_nulls)]
+            if spec.out_of_range_msg:
+                counts.append((spec.out_of_range_msg, out_of_range))
+            
+            for template, count in counts:
+                if count > 0:
+                    percentage = (count / total_rows) * 100
+                    warning_msg = f"{template.format(count=count)} ({percentage:.1f}%)"
+                    validation_results.warnings.append(warning_msg)
+                    logger.warning(warning_msg)
+        
+        except Exception as e:
+            if spec.failure_is_warning:
+                warning_msg = f"{spec.column.capitalize()} validation warning: {str(e)}"
+                validation_results.warnings.append(warning_msg)
+                logger.warning(warning_msg)
+            else:
+                error_msg = f"Error validating {spec.column}: {str(e)}"
+                validation_results.errors.append(error_msg)
+                logger.error(error_msg)
+    
+    return coerced
+
+
 def validate_sales_data(df: pd.DataFrame) -> ValidationResults:
     """Validate sales data quality and return validation results.
     
@@ -167,6 +645,52 @@ def validate_sales_data(df: pd.DataFrame) -> ValidationResults:
     Returns:
         ValidationResults model with validation status and quality score
     """
+    validation_results, _ = _validate_columns(df)
+    return validation_results
+
+
+def prepare_sales_data(df: pd.DataFrame) -> Tuple[pd.DataFrame, ValidationResults]:
+    """Coerce sales columns once and validate data quality in the same pass.
+    
+    The coerced frame is what calculate_sales_analytics expects, so a request that
+    validates and then analyzes converts each column only once.
+    
+    Args:
+        df: Input DataFrame to validate
+        
+    Returns:
+        Tuple of (prepared DataFrame with numeric quantity/price and datetime date,
+        ValidationResults model with validation status and quality score).
+        If required columns are missing or the frame is empty, the input
+        DataFrame is returned unchanged alongside the failed validation.
+    """
+    validation_results, coerced = _validate_columns(df)
+    if coerced is None:
+        return df, validation_results
+    
+    # Assemble the analytics frame from the coerced columns instead of copying
+    # the whole (possibly wide) input frame. Grouping keys become categoricals
+    # so analytics groupbys hash integer codes rather than Python strings.
+    df_clean = pd.DataFrame(
+        {
+            "date": coerced["date"],
+            "product": df["product"].astype("category"),
+            "quantity": coerced["quantity"],
+            "price": coerced["price"],
+            "customer": df["customer"].astype("category"),
+        },
+        copy=False
+    )
+
+    return df_clean, validation_results
+
+
+def _validate_columns(df: pd.DataFrame) -> Tuple[ValidationResults, Optional[Dict[str, pd.Series]]]:
+    """Run every validation check, returning the results and the coerced typed columns.
+    
+    The coerced columns are None when validation stopped early because required
+    columns are missing or the frame is empty.
+    """
     logger.info(f"Starting validation for DataFrame with {len(df)} rows")
 
     validation_results = ValidationResults(
@@ -178,8 +702,10 @@ def validate_sales_data(df: pd.DataFrame) -> ValidationResults:
     )
     
     # Required columns
-    required_columns = ["date", "product", "quantity", "price", "customer"]
-    missing_columns = [col for col in required_columns if col not in df.columns]
+    required_columns = list(REQUIRED_COLUMNS)
+    # One set difference; the list keeps REQUIRED_COLUMNS order for a stable message
+    missing = _REQUIRED_SET.difference(df.columns)
+    missing_columns = [col for col in REQUIRED_COLUMNS if col in missing]
     
     if missing_columns:
         error_msg = f"Missing required columns: {', '.join(missing_columns)}"
@@ -187,7 +713,7 @@ def validate_sales_data(df: pd.DataFrame) -> ValidationResults:
         validation_results.valid = False
         validation_results.errors.append(error_msg)
         validation_results.quality_score = 0.0
-        return validation_results
+        return validation_results, None
     
     # Check for empty dataframe
     if df.empty:
@@ -196,7 +722,7 @@ def validate_sales_data(df: pd.DataFrame) -> ValidationResults:
         validation_results.valid = False
         validation_results.errors.append(error_msg)
         validation_results.quality_score = 0.0
-        return validation_results
+        return validation_results, None
     
     # Check for duplicate rows
     duplicate_count = df.duplicated().sum()
@@ -206,8 +732,11 @@ def validate_sales_data(df: pd.DataFrame) -> ValidationResults:
         validation_results.warnings.append(warning_msg)
         logger.warning(warning_msg)
 
+    # Count nulls once; reused for per-column checks and the stats below
+    null_counts = df.isnull().sum()
+    
     # Check for missing values
-    missing_values = df[required_columns].isnull().sum()
+    missing_values = null_counts[required_columns]
     if missing_values.any():
         for col, count in missing_values.items():
             if count > 0:
@@ -216,135 +745,28 @@ def validate_sales_data(df: pd.DataFrame) -> ValidationResults:
                 validation_results.warnings.append(warning_msg)
                 logger.warning(warning_msg)
     
-    # Same logic for quantity as for price and date
-    # Distinguish between original nulls and conversion failures
-    if "quantity" in df.columns:
-        try:
-            # Count original nulls
-            original_nulls = df["quantity"].isnull().sum()
-            
-            # Test conversion without modifying original
-            test_quantity = pd.to_numeric(df["quantity"], errors="coerce")
-            
-            # Count new nulls created by conversion (Issue #2)
-            conversion_failures = test_quantity.isnull().sum() - original_nulls
-            
-            if conversion_failures > 0:
-                percentage = (conversion_failures / len(df)) * 100
-                warning_msg = f"{conversion_failures} quantity values are not numeric ({percentage:.1f}%)"
-                validation_results.warnings.append(warning_msg)
-                logger.warning(warning_msg)
-            if original_nulls > 0:
-                percentage = (original_nulls / len(df)) * 100
-                warning_msg = f"{original_nulls} quantity values are missing/null ({percentage:.1f}%)"
-                validation_results.warnings.append(warning_msg)
-                logger.warning(warning_msg)
-                
-            # Check for zero or negative quantities
-            valid_quantities = test_quantity.dropna()
-            if len(valid_quantities) > 0:
-                invalid_quantity_count = (valid_quantities <= 0).sum()
-                if invalid_quantity_count > 0:
-                    percentage = (invalid_quantity_count / len(df)) * 100
-                    warning_msg = f"{invalid_quantity_count} quantities are zero or negative ({percentage:.1f}%)"
-                    validation_results.warnings.append(warning_msg)
-                    logger.warning(warning_msg)
-        
-        except Exception as e:
-            error_msg = f"Error validating quantity: {str(e)}"
-            validation_results.errors.append(error_msg)
-            logger.error(error_msg)
-    
-    
-    
-    if "price" in df.columns:
-        try:
-            # Count original nulls
-            original_nulls = df["price"].isnull().sum()
-            
-            # Test conversion without modifying original
-            test_price = pd.to_numeric(df["price"], errors="coerce")
-            
-            # Count new nulls created by conversion
-            conversion_failures = test_price.isnull().sum() - original_nulls
-            
-            # Specific message with count
-            if conversion_failures > 0:
-                percentage = (conversion_failures / len(df)) * 100
-                warning_msg = f"{conversion_failures} prices could not be parsed ({percentage:.1f}%)"
-                validation_results.warnings.append(warning_msg)
-                logger.warning(warning_msg)
-            if original_nulls > 0:
-                percentage = (original_nulls / len(df)) * 100
-                warning_msg = f"{original_nulls} prices are missing/null ({percentage:.1f}%)"
-                validation_results.warnings.append(warning_msg)
-                logger.warning(warning_msg)
-
-                
-            # Check for zero or negative prices
-            valid_prices = test_price.dropna()
-            if len(valid_prices) > 0:
-                negative_price_count = (valid_prices < 0).sum()
-                if negative_price_count > 0:
-                    percentage = (negative_price_count / len(df)) * 100
-                    warning_msg = f"{negative_price_count} prices are negative ({percentage:.1f}%)"
-                    validation_results.warnings.append(warning_msg)
-                    logger.warning(warning_msg)
-                    
-        except Exception as e:
-            error_msg = f"Error validating price: {str(e)}"
-            validation_results.errors.append(error_msg)
-            logger.error(error_msg)
+    # Coerce and check quantity, price and date with one spec-driven scanner.
+    # Distinguishes between original nulls and conversion failures.
+    coerced = _check_typed_columns(df, null_counts, validation_results)
+    d_num = coerced["date"]
     
-    # Validate date format
+    # Calculate date range (skipped if the date column could not be converted)
     date_range_stats = None
-    if "date" in df.columns:
-        try:
-            # Count original nulls
-            original_nulls = df["date"].isnull().sum()
-            
-            # Test conversion without modifying original
-            test_dates = pd.to_datetime(df["date"], errors="coerce")
-            
-            # Count new nulls created by conversion (Issue #2)
-            conversion_failures = test_dates.isnull().sum() - original_nulls
-            
-            # Specific message with count
-            if conversion_failures > 0:
-                percentage = (conversion_failures / len(df)) * 100
-                warning_msg = f"{conversion_failures} dates could not be parsed ({percentage:.1f}%)"
-                validation_results.warnings.append(warning_msg)
-                logger.warning(warning_msg)
-            if original_nulls > 0:
-                percentage = (original_nulls / len(df)) * 100
-                warning_msg = f"{original_nulls} dates are missing/null ({percentage:.1f}%)"
-                validation_results.warnings.append(warning_msg)
-                logger.warning(warning_msg)
-
-
-            # Calculate date range
-            valid_dates = test_dates.dropna()
-            if len(valid_dates) > 0:
-                min_date = valid_dates.min()
-                max_date = valid_dates.max()
-                
-                date_range_stats = DateRangeStats(
-                    min=str(min_date.date()),
-                    max=str(max_date.date()),
-                    span_days=(max_date - min_date).days
-                )
-                
-        except Exception as e:
-            warning_msg = f"Date validation warning: {str(e)}"
-            validation_results.warnings.append(warning_msg)
-            logger.warning(warning_msg)
-
+    if pdt.is_datetime64_any_dtype(d_num):
+        # min/max skip NaT, so no dropna copy is needed
+        min_date, max_date = d_num.min(), d_num.max()
+        if pd.notna(min_date):
+            date_range_stats = DateRangeStats(
+                min=min_date.date().isoformat(),
+                max=max_date.date().isoformat(),
+                span_days=(max_date - min_date).days
+            )
 
     # Calculate basic stats
     validation_results.stats = ValidationStats(
         total_rows=len(df),
         total_columns=len(df.columns),
-        missing_values_total=int(df.isnull().sum().sum()),
+        missing_values_total=int(null_counts.sum()),
         duplicate_rows=int(duplicate_count),
         date_range=date_range_stats
     )
@@ -364,7 +786,7 @@ def validate_sales_data(df: pd.DataFrame) -> ValidationResults:
     # Update quality score
     validation_results.quality_score = quality_score
 
-    return validation_results
+    return validation_results, coerced
 
 
 def calculate_quality_score(
@@ -417,11 +839,42 @@ def calculate_quality_score(
     return max(0.0, min(100.0, round(score, 1))) # Make sure score is between 0 and 100
 
 
+def _sum_by_key(keys: pd.Series, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Sum values per distinct key with a single np.bincount pass over integer codes.
+    
+    Categorical keys (as produced by prepare_sales_data) reuse their existing
+    codes; anything else is factorized first. Missing keys are skipped, as in
+    groupby.
+    
+    Args:
+        keys: Grouping column, aligned with values
+        values: float64 array to accumulate
+        
+    Returns:
+        Tuple of (key labels, totals) for the keys that occur, in key order
+    """
+    if isinstance(keys.dtype, pd.CategoricalDtype):
+        codes = keys.cat.codes.to_numpy()
+        labels = keys.cat.categories.to_numpy()
+    else:
+        codes, uniques = pd.factorize(keys, sort=True)
+        labels = np.asarray(uniques)
+    
+    present = codes >= 0
+    if not present.all():
+        codes, values = codes[present], values[present]
+    
+    totals = np.bincount(codes, weights=values, minlength=len(labels))
+    observed = np.bincount(codes, minlength=len(labels)) > 0
+    return labels[observed], totals[observed]
+
+
 def calculate_sales_analytics(df: pd.DataFrame) -> SalesAnalytics:
     """Calculate comprehensive sales analytics.
     
     Args:
-        df: Input DataFrame with sales data
+        df: Sales DataFrame as returned by prepare_sales_data (numeric
+            quantity/price, datetime date)
         
     Returns:
         SalesAnalytics model with comprehensive sales analytics
@@ -430,47 +883,63 @@ def calculate_sales_analytics(df: pd.DataFrame) -> SalesAnalytics:
     df = df.copy()
     
     # Calculate revenue if not present or just to be safe (price * quantity)
-    # Ensure columns are numeric first
+    # Columns from prepare_sales_data are already numeric, so coercion is a no-op
+    # Work on contiguous float64 arrays so the multiply and reductions run in NumPy.
+    # Only NaN is zeroed (like fillna(0)); infinities are kept as they are.
     if "price" in df.columns and "quantity" in df.columns:
-        df["price"] = pd.to_numeric(df["price"], errors="coerce").fillna(0)
-        df["quantity"] = pd.to_numeric(df["quantity"], errors="coerce").fillna(0)
-        df["revenue"] = df["price"] * df["quantity"]
-    elif "revenue" not in df.columns:
-        # Fallback if we can't calculate and it's missing
-        df["revenue"] = 0.0
+        quantity = np.nan_to_num(
+            _as_numeric(df["quantity"]).to_numpy(dtype=np.float64, na_value=np.nan),
+            copy=False, nan=0.0, posinf=np.inf, neginf=-np.inf
+        )
+        price = np.nan_to_num(
+            _as_numeric(df["price"]).to_numpy(dtype=np.float64, na_value=np.nan),
+            copy=False, nan=0.0, posinf=np.inf, neginf=-np.inf
+        )
+        revenue = np.multiply(quantity, price)
+        df["quantity"] = quantity
+        df["revenue"] = revenue
+    else:
+        if "revenue" not in df.columns:
+            # Fallback if we can't calculate and it's missing
+            df["revenue"] = 0.0
+        quantity = df["quantity"].to_numpy(dtype=np.float64, na_value=np.nan)
+        revenue = df["revenue"].to_numpy(dtype=np.float64, na_value=np.nan)
 
-    # Top products by revenue
-    top_products_revenue = (
-        df.groupby("product")["revenue"]
+    # Per-product totals from a single groupby (no key sort needed before nlargest)
+    product_totals = (
+        df.groupby("product", sort=False, observed=True)[["revenue", "quantity"]]
         .sum()
-        .sort_values(ascending=False)
-        .head(10)
-        .to_dict()
     )
     
+    # Top products by revenue
+    top_products_revenue = product_totals["revenue"].nlargest(10).to_dict()
+    
     # Top products by quantity
-    top_products_quantity = (
-        df.groupby("product")["quantity"]
-        .sum()
-        .sort_values(ascending=False)
-        .head(10)
-        .to_dict()
-    )
+    top_products_quantity = product_totals["quantity"].nlargest(10).to_dict()
     
-    # Customer segments (by total revenue)
-    customer_revenue = df.groupby("customer")["revenue"].sum().sort_values(ascending=False)
+    # Customer segments (by total revenue, highest first)
+    customers, values = _sum_by_key(df["customer"], revenue)
+    order = np.argsort(-values, kind="stable")
+    customers, values = customers[order], values[order]
     
-    # Segment customers
-    if len(customer_revenue) > 0:
-        high_value_threshold = customer_revenue.quantile(0.8)
-        medium_value_threshold = customer_revenue.quantile(0.5)
+    # Segment customers: both thresholds in one quantile call, then a single
+    # digitize pass assigns 0 = low, 1 = medium, 2 = high
+    if len(values) > 0:
+        medium_value_threshold, high_value_threshold = np.quantile(values, [0.5, 0.8])
+        segment = np.digitize(values, [medium_value_threshold, high_value_threshold])
+        
+        # Values are sorted highest first, so each segment is a contiguous run
+        # and the dicts can be built from slices instead of boolean masks
+        n_low, n_medium, n_high = np.bincount(segment, minlength=3).tolist()
+        labels, totals = customers.tolist(), values.tolist()
+        split = n_high + n_medium
+        high = dict(zip(labels[:n_high], totals[:n_high]))
+        medium = dict(zip(labels[n_high:split], totals[n_high:split]))
+        low = dict(zip(labels[split:], totals[split:]))
         customer_segments = CustomerSegments(
-            high_value=customer_revenue[customer_revenue >= high_value_threshold].to_dict(),
-            medium_value=customer_revenue[
-                (customer_revenue >= medium_value_threshold) &
-                (customer_revenue < high_value_threshold)
-                ].to_dict(),
-            low_value=customer_revenue[customer_revenue < medium_value_threshold].to_dict()
+            high_value=high,
+            medium_value=medium,
+            low_value=low
         )
     else:
         customer_segments = CustomerSegments(
@@ -482,30 +951,30 @@ def calculate_sales_analytics(df: pd.DataFrame) -> SalesAnalytics:
     # Time-based analysis
     time_analysis = TimeAnalysis()
     if "date" in df.columns:
-        df_copy = df.copy() 
-        df_copy["date"] = pd.to_datetime(df_copy["date"], errors="coerce")
-        df_with_dates = df_copy.dropna(subset=["date"])
+        # No-op for prepared frames; the date column is already datetime
+        dates = _as_datetime(df["date"])
         
-        if len(df_with_dates) > 0:
-            # Daily revenue
-            daily_revenue = (
-                df_with_dates.groupby(df_with_dates["date"].dt.date)["revenue"]
-                .sum()
-                .to_dict()
-            )
-            time_analysis.daily_revenue = {str(k): float(v) for k, v in daily_revenue.items()}
+        # Rows with NaT dates are dropped by groupby itself, so no filtered copy.
+        # Dates that could not be coerced to one datetime dtype (e.g. mixed UTC
+        # offsets) are left out of the time analysis.
+        if pdt.is_datetime64_any_dtype(dates) and dates.notna().any():
+            # Daily revenue (floor keeps the key as datetime64 instead of Python dates)
+            daily_revenue = df.groupby(dates.dt.floor("D"))["revenue"].sum()
+            time_analysis.daily_revenue = dict(zip(
+                daily_revenue.index.strftime("%Y-%m-%d").tolist(),
+                daily_revenue.to_numpy(dtype=np.float64).tolist()
+            ))
             
             # Monthly revenue
-            monthly_revenue = (
-                df_with_dates.groupby(df_with_dates["date"].dt.to_period("M"))["revenue"]
-                .sum()
-                .to_dict()
-            )
-            time_analysis.monthly_revenue = {str(k): float(v) for k, v in monthly_revenue.items()}
+            monthly_revenue = df.groupby(dates.dt.to_period("M"))["revenue"].sum()
+            time_analysis.monthly_revenue = dict(zip(
+                monthly_revenue.index.strftime("%Y-%m").tolist(),
+                monthly_revenue.to_numpy(dtype=np.float64).tolist()
+            ))
     
-    total_revenue = df["revenue"].sum()
-    total_quantity = df["quantity"].sum()
-    avg_order_value = total_revenue / len(df)
+    total_revenue = float(revenue.sum())
+    total_quantity = float(quantity.sum())
+    avg_order_value = float(revenue.mean())
 
     sales_analytics = SalesAnalytics(
         total_revenue=total_revenue,
@@ -519,4 +988,46 @@ def calculate_sales_analytics(df: pd.DataFrame) -> SalesAnalytics:
     )
 
 
-    return sales_analytics
\ No newline at end of file
+    return sales_analytics
+
+
+def analyze_upload(
+    path: str,
+    key: Tuple[str, bytes],
+    parquet_cache_dir: Optional[str] = None
+) -> Tuple[ValidationResults, Optional[SalesAnalytics]]:
+    """Parse, validate and analyze an upload file in one call.
+    
+    Takes and returns only picklable values so it can run in a worker process,
+    keeping CPU-bound pandas work off the API process.
+    
+    Args:
+        path: Path of the upload as written by spool_upload_to_disk
+        key: Cache key returned by upload_cache_key for the upload
+        parquet_cache_dir: Optional directory for persisted Parquet copies of uploads
+        
+    Returns:
+        Tuple of (ValidationResults, SalesAnalytics or None if validation failed)
+        
+    Raises:
+        UploadReadError: If the file cannot be parsed
+    """
+    try:
+        with open(path, "rb") as source:
+            df = _load_upload(source, key, parquet_cache_dir)
+    except Exception as e:
+        raise UploadReadError(str(e)) from None
+    
+    df, validation_results = prepare_sales_data(df)
+    if not validation_results.valid:
+        return validation_results, None
+    return validation_results, calculate_sales_analytics(df)
+
+
+def init_analysis_worker(log_level: int, log_format: str) -> None:
+    """Process-pool initializer: log straight to the console from the worker.
+    
+    The API process's queue-based handlers have no listener in a worker, so
+    they are replaced rather than inherited.
+    """
+    logging.basicConfig(level=log_level, format=log_format, force=True)
@@ -1,11 +1,22 @@
 """API routes for the FastAPI Sales Analytics application."""
+import asyncio
 import logging
+import os
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
 from fastapi import APIRouter, File, UploadFile, HTTPException, Depends, Request
 from fastapi.security import APIKeyHeader
-from fastapi.responses import JSONResponse
-from config import settings
-from processing import validate_and_read_file, validate_sales_data, calculate_sales_analytics
+from fastapi.responses import ORJSONResponse
+from config import Settings, get_settings
+from processing import (
+    read_file_summary,
+    read_and_validate_file,
+    upload_cache_key,
+    spool_upload_to_disk,
+    analyze_upload,
+    analysis_cache,
+    UploadReadError
+)
 from schemas import (
     HealthResponse,
     QuickStatsResponse,
@@ -22,9 +33,12 @@ router = APIRouter()
 
 # API Key Authentication
 # API Key Authentication
-api_key_header = APIKeyHeader(name=settings.API_KEY_HEADER, auto_error=False)
+api_key_header = APIKeyHeader(name=get_settings().API_KEY_HEADER, auto_error=False)
 
-async def verify_api_key(api_key: str = Depends(api_key_header)):
+async def verify_api_key(
+    api_key: str = Depends(api_key_header),
+    settings: Settings = Depends(get_settings)
+):
     """Verify API key from request headers."""
     if not api_key:
         raise HTTPException(
@@ -42,7 +56,7 @@ async def verify_api_key(api_key: str = Depends(api_key_header)):
 
 
 @router.get("/health", response_model=HealthResponse)
-async def health_check():
+async def health_check(settings: Settings = Depends(get_settings)):
     """Health check endpoint."""
     return HealthResponse(
         status="healthy",
@@ -54,22 +68,23 @@ async def health_check():
 @router.post("/quick-stats", response_model=QuickStatsResponse)
 async def quick_stats(
     file: UploadFile = File(...),
-    _api_key: str = Depends(verify_api_key)
+    _api_key: str = Depends(verify_api_key),
+    settings: Settings = Depends(get_settings)
 ):
     """Get quick statistics about the uploaded file."""
     logger.info(f"Quick stats requested for file: {file.filename}")
     
     try:
-        df = validate_and_read_file(file, settings.MAX_FILE_SIZE)
+        # Blocking parse/pandas work runs in a worker thread so the event loop
+        # keeps serving other requests
+        summary = await asyncio.to_thread(
+            read_file_summary, file, settings.MAX_FILE_SIZE, settings.PARQUET_CACHE_DIR
+        )
         
         return QuickStatsResponse(
             filename=file.filename,
             file_size=file.size,
-            rows=len(df),
-            columns=len(df.columns),
-            column_names=list(df.columns),
-            data_types={col: str(dtype) for col, dtype in df.dtypes.items()},
-            sample_data=df.head(5).to_dict(orient="records")
+            **summary
         )
     except HTTPException:
         raise
@@ -84,14 +99,16 @@ async def quick_stats(
 @router.post("/validate", response_model=ValidateResponse)
 async def validate_data(
     file: UploadFile = File(...),
-    _api_key: str = Depends(verify_api_key)
+    _api_key: str = Depends(verify_api_key),
+    settings: Settings = Depends(get_settings)
 ):
     """Validate data quality of the uploaded sales file."""
     logger.info(f"Validation requested for file: {file.filename}")
     
     try:
-        df = validate_and_read_file(file, settings.MAX_FILE_SIZE)
-        validation_results = validate_sales_data(df)
+        validation_results = await asyncio.to_thread(
+            read_and_validate_file, file, settings.MAX_FILE_SIZE, settings.PARQUET_CACHE_DIR
+        )
         
         return ValidateResponse(
             filename=file.filename,
@@ -108,19 +125,65 @@ async def validate_data(
         )
 
 
+async def _run_analysis(request: Request, *args):
+    """Run analyze_upload in the app's process pool, replacing the pool if it broke.
+    
+    A worker that dies (e.g. OOM-killed on a large upload) breaks the whole
+    pool, so it is replaced for later requests and this one gets a 503.
+    
+    Raises:
+        HTTPException: 503 if the pool broke while running this request
+    """
+    state = request.app.state
+    # Falls back to the default thread pool if the app was started without one
+    process_pool = getattr(state, "process_pool", None)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(
+            process_pool, analyze_upload, *args
+        )
+    except BrokenProcessPool:
+        # Concurrent requests on the same broken pool replace it only once
+        if state.process_pool is process_pool:
+            logger.error("Analysis worker died; replacing the process pool")
+            state.process_pool = state.create_process_pool()
+            process_pool.shutdown(wait=False, cancel_futures=True)
+        raise HTTPException(
+            status_code=503,
+            detail="Analysis worker failed; please retry the request."
+        )
+
+
 @router.post("/analyze", response_model=AnalyzeResponse)
 async def analyze_sales(
+    request: Request,
     file: UploadFile = File(...),
-    _api_key: str = Depends(verify_api_key)
+    _api_key: str = Depends(verify_api_key),
+    settings: Settings = Depends(get_settings)
 ):
     """Perform full sales analysis on the uploaded file."""
     logger.info(f"Full analysis requested for file: {file.filename}")
     
     try:
-        df = validate_and_read_file(file, settings.MAX_FILE_SIZE)
+        key = await asyncio.to_thread(upload_cache_key, file, settings.MAX_FILE_SIZE)
         
-        # First validate the data
-        validation_results = validate_sales_data(df)
+        # Parse, validate and analyze in the process pool; repeat uploads reuse
+        # the cached result. The worker reads the upload from a temporary file
+        # rather than receiving its bytes.
+        result = analysis_cache.get(key)
+        if result is None:
+            path = await asyncio.to_thread(spool_upload_to_disk, file)
+            try:
+                result = await _run_analysis(request, path, key, settings.PARQUET_CACHE_DIR)
+            except UploadReadError as e:
+                logger.error(f"Error reading file '{file.filename}': {str(e)}")
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Error reading file: {str(e)}"
+                )
+            finally:
+                os.remove(path)
+            analysis_cache.put(key, result)
+        validation_results, analytics = result
         
         if not validation_results.valid:
             error_response = ErrorResponse(
@@ -128,20 +191,21 @@ async def analyze_sales(
                 validation=validation_results,
                 timestamp=datetime.now().isoformat()
             )
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=400,
                 content=error_response.model_dump()
             )
         
-        # Calculate analytics
-        analytics = calculate_sales_analytics(df)
-        
-        return AnalyzeResponse(
+        # The nested models were validated when they were built, so skip the
+        # response_model round trip (dump, re-validate, encode) and serialize
+        # directly; response_model still documents the schema
+        response = AnalyzeResponse.model_construct(
             filename=file.filename,
             validation=validation_results,
             analytics=analytics,
             timestamp=datetime.now().isoformat()
         )
+        return ORJSONResponse(content=response.model_dump())
     except HTTPException:
         raise
     except Exception as e:
@@ -43,7 +43,7 @@ class QuickStatsResponse(BaseModel):
     columns: int
     column_names: List[str]
     data_types: Dict[str, str]
-    sample_data: List[Dict[str, Any]]
+    sample_data: Dict[str, List[Any]]
 
 
 class ValidateResponse(BaseModel):
@@ -0,0 +1,31 @@
+"""Shared fixtures for the API tests."""
+import os
+
+# Settings are read from the environment when config is imported, so they must
+# be in place before the app is
+os.environ.update(
+    API_KEY="test-api-key",
+    API_KEY_HEADER="X-API-Key",
+    APP_NAME="FastAPI Sales Analytics",
+    APP_VERSION="1.0.0",
+    DEBUG="False",
+    CORS_ORIGINS='["*"]',
+    CORS_ALLOW_CREDENTIALS="True",
+    CORS_ALLOW_METHODS='["*"]',
+    CORS_ALLOW_HEADERS='["*"]',
+    LOG_LEVEL="WARNING",
+    MAX_FILE_SIZE=str(10 * 1024 * 1024),
+)
+
+import pytest
+from fastapi.testclient import TestClient
+
+AUTH_HEADERS = {"X-API-Key": "test-api-key"}
+
+
+@pytest.fixture(scope="session")
+def client():
+    """Test client running the app's lifespan (log listener and process pool)."""
+    from main import app
+    with TestClient(app) as test_client:
+        yield test_client
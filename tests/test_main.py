@@ -0,0 +1,63 @@
+"""Tests for the request decompression middleware."""
+import gzip
+
+from conftest import AUTH_HEADERS
+
+CSV = b"date,product,quantity,price,customer\n2024-01-01,A,1,2.5,x\n"
+
+
+def multipart_body(client, contents=CSV):
+    """Return the encoded multipart body and its content type for a file upload."""
+    request = client.build_request(
+        "POST", "/validate", files={"file": ("sales.csv", contents, "text/csv")}
+    )
+    return request.read(), request.headers["content-type"]
+
+
+def post_encoded(client, body, content_type, encoding):
+    """POST an already-encoded body to /validate with a Content-Encoding header."""
+    return client.post(
+        "/validate",
+        content=body,
+        headers={**AUTH_HEADERS, "content-type": content_type, "content-encoding": encoding}
+    )
+
+
+def test_gzip_body_is_decompressed(client):
+    """A gzip-encoded upload validates the same as the plain one."""
+    body, content_type = multipart_body(client)
+    
+    response = post_encoded(client, gzip.compress(body), content_type, "gzip")
+    
+    assert response.status_code == 200
+    assert response.json()["validation"]["valid"] is True
+
+
+def test_gzip_bomb_is_rejected_with_413(client):
+    """A small body that inflates past the size cap is rejected, not buffered."""
+    _, content_type = multipart_body(client)
+    bomb = gzip.compress(b"0" * (50 * 1024 * 1024))
+    assert len(bomb) < 64 * 1024
+    
+    response = post_encoded(client, bomb, content_type, "gzip")
+    
+    assert response.status_code == 413
+
+
+def test_truncated_gzip_body_is_rejected_with_400(client):
+    """A gzip stream cut short is not accepted as a shorter body."""
+    body, content_type = multipart_body(client)
+    
+    response = post_encoded(client, gzip.compress(body)[:-8], content_type, "gzip")
+    
+    assert response.status_code == 400
+    assert "truncated" in response.json()["detail"]
+
+
+def test_unsupported_encoding_is_rejected_with_415(client):
+    """Encodings the middleware cannot decode are refused up front."""
+    body, content_type = multipart_body(client)
+    
+    response = post_encoded(client, body, content_type, "br")
+    
+    assert response.status_code == 415
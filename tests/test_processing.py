@@ -0,0 +1,101 @@
+"""Tests for the data processing helpers."""
+import io
+
+import pandas as pd
+
+from processing import (
+    _LRUCache,
+    _analysis_size,
+    _read_csv,
+    calculate_sales_analytics,
+    prepare_sales_data,
+)
+
+
+def analyze_frame(customers: int):
+    """Run validation and analytics on a frame with one row per customer."""
+    df = pd.DataFrame({
+        "date": ["2024-01-01"] * customers,
+        "product": ["Widget"] * customers,
+        "quantity": range(1, customers + 1),
+        "price": [2.5] * customers,
+        "customer": [f"Customer {i}" for i in range(customers)],
+    })
+    prepared, validation_results = prepare_sales_data(df)
+    return validation_results, calculate_sales_analytics(prepared)
+
+
+def test_analysis_size_grows_with_distinct_customers():
+    """Results with a segment entry per customer are sized accordingly."""
+    small = _analysis_size(analyze_frame(10))
+    large = _analysis_size(analyze_frame(10_000))
+    
+    assert 0 < small < large
+    assert large > 10_000 * 64
+
+
+def test_analysis_size_of_failed_validation_is_zero():
+    """Failed validations carry no analytics, so they cost nothing in the budget."""
+    _, validation_results = prepare_sales_data(pd.DataFrame({"a": [1]}))
+    
+    assert _analysis_size((validation_results, None)) == 0
+
+
+def test_read_csv_names_empty_and_duplicate_headers_like_pandas():
+    """Headers pyarrow would keep as '' or repeat get pandas' column names."""
+    contents = b"date,product,quantity,price,price,\n2024-01-01,A,1,2.5,3.0,\n"
+    
+    df = _read_csv(io.BytesIO(contents))
+    
+    assert list(df.columns) == list(pd.read_csv(io.BytesIO(contents)).columns)
+    assert list(df.columns)[-2:] == ["price.1", "Unnamed: 5"]
+
+
+def test_read_csv_keeps_trailing_comma_header_column():
+    """A trailing comma in the header alone gives pandas' Unnamed column."""
+    contents = b"date,product,\n2024-01-01,A,\n"
+    
+    assert list(_read_csv(io.BytesIO(contents)).columns) == ["date", "product", "Unnamed: 2"]
+
+
+def test_analytics_keep_infinite_quantities():
+    """Only missing values are zeroed; inf is not clamped to the float maximum."""
+    df = pd.DataFrame({
+        "date": ["2024-01-01", "2024-01-02"],
+        "product": ["A", "B"],
+        "quantity": [float("inf"), None],
+        "price": [2.0, 3.0],
+        "customer": ["x", "y"],
+    })
+    prepared, _ = prepare_sales_data(df)
+    
+    analytics = calculate_sales_analytics(prepared)
+    
+    assert analytics.total_quantity == float("inf")
+    assert analytics.top_products_by_quantity["B"] == 0.0
+
+
+def test_lru_cache_evicts_least_recently_used_within_byte_budget():
+    """Entries are evicted oldest-first until the reported sizes fit the budget."""
+    cache = _LRUCache(maxsize=10, maxbytes=100, sizeof=len)
+    for key in range(3):
+        cache.put(key, "x" * 40)
+    
+    assert cache.get(0) is None
+    assert cache.get(1) is not None
+    
+    # 1 was just used, so 2 is now the oldest entry
+    cache.put(3, "x" * 40)
+    assert cache.get(2) is None
+    assert cache.get(1) is not None
+
+
+def test_lru_cache_skips_values_larger_than_budget():
+    """A value bigger than the whole budget is not cached and evicts nothing."""
+    cache = _LRUCache(maxsize=10, maxbytes=100, sizeof=len)
+    cache.put("small", "x" * 10)
+    
+    cache.put("huge", "x" * 101)
+    
+    assert cache.get("huge") is None
+    assert cache.get("small") is not None
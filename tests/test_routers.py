@@ -0,0 +1,70 @@
+"""Tests for the API endpoints."""
+import os
+import signal
+
+from conftest import AUTH_HEADERS
+
+HEADER = b"date,product,quantity,price,customer\n"
+
+
+def upload(client, endpoint, contents, filename="sales.csv"):
+    """POST contents as a multipart file upload."""
+    return client.post(
+        endpoint,
+        files={"file": (filename, contents, "text/csv")},
+        headers=AUTH_HEADERS
+    )
+
+
+def test_quick_stats_reports_missing_timestamps_as_null(client):
+    """Missing values in a parsed timestamp column must not break serialization."""
+    contents = HEADER + b"2024-01-01 10:00:00,A,1,2.5,x\n,B,2,,y\n"
+    
+    response = upload(client, "/quick-stats", contents)
+    
+    assert response.status_code == 200
+    sample = response.json()["sample_data"]
+    assert sample["date"][1] is None
+    assert sample["price"] == [2.5, None]
+
+
+def test_validate_repeat_upload_returns_same_results(client):
+    """The second /validate of identical content is served from the validation cache."""
+    contents = HEADER + b"2024-01-01,A,1,2.5,x\n2024-01-02,B,-1,3.0,y\n"
+    
+    first = upload(client, "/validate", contents).json()["validation"]
+    second = upload(client, "/validate", contents).json()["validation"]
+    
+    assert first == second
+    assert first["valid"] is True
+    assert "1 quantities are zero or negative (50.0%)" in first["warnings"]
+
+
+def test_quick_stats_parses_date_only_columns_as_datetime(client):
+    """Plain YYYY-MM-DD dates come out typed, like timestamp columns do."""
+    contents = HEADER + b"2024-01-01,A,1,2.5,x\n2024-01-02,B,2,3.0,y\n"
+    
+    response = upload(client, "/quick-stats", contents)
+    
+    assert response.status_code == 200
+    assert response.json()["data_types"]["date"].startswith("datetime64")
+
+
+def test_analyze_replaces_broken_process_pool(client):
+    """A dead worker fails only the request it was running; the next one succeeds."""
+    contents = HEADER + b"2024-01-01,A,1,2.5,x\n2024-01-02,B,2,3.0,y\n"
+    assert upload(client, "/analyze", contents).status_code == 200
+    
+    state = client.app.state
+    broken_pool = state.process_pool
+    for process in list(broken_pool._processes.values()):
+        os.kill(process.pid, signal.SIGKILL)
+        process.join()
+    
+    # Different content, so the result is not served from analysis_cache
+    response = upload(client, "/analyze", contents + b"2024-01-03,C,3,4.0,z\n")
+    assert response.status_code == 503
+    assert state.process_pool is not broken_pool
+    
+    response = upload(client, "/analyze", contents + b"2024-01-04,D,4,5.0,w\n")
+    assert response.status_code == 200